@@ -247,4 +247,18 @@ class QueueIntegrationMixin:
         elif job_info['status'] == 'failed':
             status += f"Error: {job_info.get('error', 'Unknown error')}\n"
         
-        return status
\ No newline at end of file
+        return status
+
+
+class QueueClient(QueueIntegrationMixin):
+    """
+    Standalone queue client for servers that hold the queue integration
+    as a component instead of inheriting from the mixin
+    
+    Usage:
+        self._queue = QueueClient(queue_url="http://localhost:8000")
+        job_info = await self._queue.submit_job(...)
+    """
+    
+    def __init__(self, queue_url: str = "http://localhost:8000"):
+        self.queue_url = queue_url
\ No newline at end of file
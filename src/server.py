@@ -1,8 +1,14 @@
 import asyncio
+import atexit
+import errno
 import logging
+import mmap
 import os
+import shutil
+import signal
+import sys
 import tempfile
-from pathlib import Path
+from functools import lru_cache
 from typing import Any, Optional
 
 from mcp.server import Server
@@ -11,6 +17,11 @@ from mcp.types import Tool, TextContent, ImageContent, ErrorContent
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as _timeout
+else:
+    from async_timeout import timeout as _timeout
+
 
 logger = logging.getLogger(__name__)
 
@@ -19,130 +30,374 @@ class ServerSettings(BaseSettings):
     max_file_size: int = Field(default=100_000_000, description="Maximum input file size in bytes")
     temp_dir: Optional[str] = Field(default=None, description="Temporary directory for processing")
     timeout: int = Field(default=1800, description="Command timeout in seconds")
+    max_output_size: int = Field(default=10_000_000, description="Maximum output bytes returned inline")
+    scratch_pool_size: int = Field(default=5, ge=1, description="Number of scratch directories kept for reuse between runs")
     interpro_path: str = Field(default="interproscan.sh", description="Path to InterProScan executable")
     
     class Config:
         env_prefix = "BIO_MCP_"
 
 
+@lru_cache(maxsize=1)
+def _default_settings() -> ServerSettings:
+    """Parse settings from the environment once per process."""
+    return ServerSettings()
+
+
+# Seconds to wait for a killed InterProScan process to exit
+_REAP_TIMEOUT = 10.0
+
+# Link failures that mean "this link type is not possible here", not "bad input"
+_LINK_FALLBACK_ERRNOS = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP)
+
+
+def _unlink_quietly(path: str) -> None:
+    """Remove path if it exists, so a stale link is never written through."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _stage_input(src: str, dst: str) -> None:
+    """Make ``src`` available at ``dst`` without reading it into memory.
+
+    Tries a hard link first, then a symlink, and finally falls back to a
+    streaming copy when neither link type is permitted (e.g. across devices).
+    Any existing ``dst`` is removed first so a leftover link from an earlier
+    run cannot redirect the copy onto another caller's file.
+    """
+    _unlink_quietly(dst)
+    try:
+        os.link(src, dst)
+        return
+    except OSError as e:
+        if e.errno not in _LINK_FALLBACK_ERRNOS:
+            raise
+    _unlink_quietly(dst)
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return
+    except OSError as e:
+        if e.errno not in _LINK_FALLBACK_ERRNOS:
+            raise
+    _unlink_quietly(dst)
+    shutil.copyfile(src, dst)
+
+
+def _concat_inputs(srcs: list[str], dst: str) -> None:
+    """Stream several input files into ``dst`` in 64 KiB chunks.
+
+    A newline is inserted between files whose content does not already end
+    with one, so FASTA records never run together.
+    """
+    _unlink_quietly(dst)
+    with open(dst, "wb") as out:
+        needs_newline = False
+        for src in srcs:
+            if needs_newline:
+                out.write(b"\n")
+            last = b""
+            with open(src, "rb") as f:
+                while chunk := f.read(65536):
+                    out.write(chunk)
+                    last = chunk
+            needs_newline = bool(last) and not last.endswith(b"\n")
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kill process together with its children (e.g. the InterProScan JVM).
+
+    On POSIX the process leads its own session, so its whole process group is
+    signalled; elsewhere only the process itself can be killed.
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _kill_and_reap(process: asyncio.subprocess.Process) -> bool:
+    """Kill the process group and wait for the process to exit.
+
+    The wait is shielded so a cancelled caller still reaps the child. Returns
+    True once the process is confirmed dead, False if it could not be reaped
+    within _REAP_TIMEOUT seconds.
+    """
+    _kill_process_group(process)
+    try:
+        await asyncio.shield(asyncio.wait_for(process.wait(), _REAP_TIMEOUT))
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        pass
+    return process.returncode is not None
+
+
 class InterproServer:
     def __init__(self, settings: Optional[ServerSettings] = None):
-        self.settings = settings or ServerSettings()
+        self.settings = settings or _default_settings()
         self.server = Server("bio-mcp-interpro")
+        self._tmp_root: Optional[str] = None
+        self._tmp_pool: list[str] = []
+        self._tmp_slots: set[str] = set()
         self._setup_handlers()
         
     def _setup_handlers(self):
+        # Tool definitions are static, so build them once rather than per request.
+        # tools and tool_handlers are public so wrapping servers can reuse them.
+        self.tools = [
+            Tool(
+                name="interpro_run",
+                description="Run InterProScan protein domain and family analysis",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "input_file": {
+                            "type": "string", 
+                            "description": "Path to input file"
+                        },
+                        "input_files": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Paths to several input files, analysed together in a single InterProScan run (alternative to input_file)"
+                        },
+                        # Add tool-specific parameters here
+                        "databases": {
+                            "type": "string",
+                            "description": "Comma-separated list of databases to search (optional)"
+                        },
+                        "output_format": {
+                            "type": "string",
+                            "description": "Output format (tsv, xml, json, gff3)",
+                            "default": "tsv"
+                        },
+                        "disable_precalc": {
+                            "type": "boolean",
+                            "description": "Skip the precalculated match lookup and compute every match locally",
+                            "default": False
+                        },
+                        "cpus": {
+                            "type": "integer",
+                            "description": "Number of CPU cores InterProScan may use",
+                            "default": os.cpu_count() or 1
+                        },
+                    },
+                    "required": []
+                }
+            ),
+            # Add more tool functions as needed
+        ]
+        
         @self.server.list_tools()
         async def list_tools() -> list[Tool]:
-            return [
-                Tool(
-                    name="interpro_run",
-                    description="Run InterProScan protein domain and family analysis",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "input_file": {
-                                "type": "string", 
-                                "description": "Path to input file"
-                            },
-                            # Add tool-specific parameters here
-                            "databases": {
-                                "type": "string",
-                                "description": "Comma-separated list of databases to search (optional)"
-                            },
-                            "output_format": {
-                                "type": "string",
-                                "description": "Output format (tsv, xml, json, gff3)",
-                                "default": "tsv"
-                            },
-                        },
-                        "required": ["input_file"]
-                    }
-                ),
-                # Add more tool functions as needed
-            ]
+            return self.tools
+        
+        self.tool_handlers = {
+            "interpro_run": self._run_interpro,
+        }
         
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Any) -> list[TextContent | ImageContent | ErrorContent]:
-            if name == "interpro_run":
-                return await self._run_interpro(arguments)
-            else:
+            handler = self.tool_handlers.get(name)
+            if handler is None:
                 return [ErrorContent(text=f"Unknown tool: {name}")]
+            return await handler(arguments)
     
     async def _run_interpro(self, arguments: dict) -> list[TextContent | ErrorContent]:
         try:
-            # Validate input file
-            input_path = Path(arguments["input_file"])
-            if not input_path.exists():
-                return [ErrorContent(text=f"Input file not found: {input_path}")]
+            # Batches share one InterProScan (and JVM) launch
+            input_files = arguments.get("input_files") or []
+            if not isinstance(input_files, list) or not all(isinstance(f, str) for f in input_files):
+                return [ErrorContent(text="input_files must be a list of file paths")]
+            if arguments.get("input_file"):
+                input_files = [arguments["input_file"], *input_files]
+            if not input_files:
+                return [ErrorContent(text="Either input_file or input_files is required")]
             
-            if input_path.stat().st_size > self.settings.max_file_size:
+            # Validate input files with a single stat() call each
+            total_size = 0
+            for input_file in input_files:
+                try:
+                    total_size += os.stat(input_file).st_size
+                except FileNotFoundError:
+                    return [ErrorContent(text=f"Input file not found: {input_file}")]
+            
+            if total_size > self.settings.max_file_size:
                 return [ErrorContent(text=f"File too large. Maximum size: {self.settings.max_file_size} bytes")]
             
-            # Create temporary directory for processing
-            with tempfile.TemporaryDirectory(dir=self.settings.temp_dir) as tmpdir:
-                # Copy input file to temp directory
-                temp_input = Path(tmpdir) / input_path.name
-                temp_input.write_bytes(input_path.read_bytes())
+            # Borrow a scratch directory from the pool for processing
+            tmpdir = self._acquire_tmpdir()
+            process = None
+            try:
+                # Stage input in temp directory
+                if len(input_files) == 1:
+                    input_name = os.path.basename(input_files[0])
+                    temp_input_str = os.path.join(tmpdir, input_name)
+                    _stage_input(input_files[0], temp_input_str)
+                else:
+                    input_name = "batch_input.fasta"
+                    temp_input_str = os.path.join(tmpdir, input_name)
+                    await asyncio.to_thread(_concat_inputs, input_files, temp_input_str)
                 
                 # Build command
-                output_file = Path(tmpdir) / f"{temp_input.stem}_interpro"
+                temp_stem = os.path.splitext(input_name)[0]
+                output_file_str = os.path.join(tmpdir, temp_stem + "_interpro")
                 output_format = arguments.get("output_format", "tsv")
                 
+                appl = arguments.get("databases")
+                cpus = int(arguments.get("cpus") or os.cpu_count() or 1)
+                
                 cmd = [
                     self.settings.interpro_path,
-                    "-i", str(temp_input),
-                    "-o", str(output_file),
+                    "-i", temp_input_str,
+                    "-o", output_file_str,
                     "-f", output_format,
-                    "--disable-precalc"  # Disable precalculated matches for better error handling
-                ]
-                
-                # Add databases if specified
-                if "databases" in arguments and arguments["databases"]:
-                    cmd.extend(["-appl", arguments["databases"]])
-                
-                # Add additional parameters for better performance/output
-                cmd.extend([
+                    "-cpu", str(cpus),
                     "--goterms",  # Include GO term annotations
-                    "--pathways"  # Include pathway annotations
-                ])
+                    "--pathways",  # Include pathway annotations
+                    # Precalculated match lookup skips analysis of already-known sequences
+                    *(("--disable-precalc",) if arguments.get("disable_precalc", False) else ()),
+                    # Add databases if specified
+                    *(("-appl", appl) if appl else ()),
+                ]
                 
-                # Execute command
+                # Execute command (results are written to output_file_str, not stdout)
                 process = await asyncio.create_subprocess_exec(
                     *cmd,
-                    stdout=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.DEVNULL,
                     stderr=asyncio.subprocess.PIPE,
-                    cwd=tmpdir
+                    cwd=tmpdir,
+                    start_new_session=os.name == "posix"
                 )
                 
                 try:
-                    stdout, stderr = await asyncio.wait_for(
-                        process.communicate(),
-                        timeout=self.settings.timeout
-                    )
+                    async with _timeout(self.settings.timeout):
+                        _, stderr = await process.communicate()
                 except asyncio.TimeoutError:
-                    process.kill()
+                    await _kill_and_reap(process)
                     return [ErrorContent(text=f"Command timed out after {self.settings.timeout} seconds")]
+                except BaseException:
+                    # Cancellation or any other exit must not orphan the wrapper and JVM
+                    await _kill_and_reap(process)
+                    raise
                 
                 if process.returncode != 0:
-                    return [ErrorContent(text=f"Command failed: {stderr.decode()}"
+                    return [ErrorContent(text=f"Command failed: {stderr[-65536:].decode(errors='replace')}"
                 )]
                 
                 # Process output
-                output = stdout.decode()
+                output = await asyncio.to_thread(self._read_output, output_file_str)
                 
                 # Return results
                 return [TextContent(text=output)]
+            finally:
+                if process is not None and process.returncode is None:
+                    # The child may still write into tmpdir; never hand it to another run
+                    self._discard_tmpdir(tmpdir)
+                else:
+                    self._release_tmpdir(tmpdir)
                 
         except Exception as e:
             logger.error(f"Error running interpro: {e}", exc_info=True)
             return [ErrorContent(text=f"Error: {str(e)}")]
     
+    def _acquire_tmpdir(self) -> str:
+        """Take a scratch directory from the pool, creating the pool on first use.
+        
+        Runs never wait for a slot: when every pooled directory is busy a
+        one-off directory is created instead and removed on release.
+        """
+        if self._tmp_root is None:
+            self._tmp_root = tempfile.mkdtemp(prefix="bio-mcp-interpro-", dir=self.settings.temp_dir)
+            atexit.register(shutil.rmtree, self._tmp_root, ignore_errors=True)
+            for i in range(self.settings.scratch_pool_size):
+                slot = os.path.join(self._tmp_root, f"slot{i}")
+                os.mkdir(slot)
+                self._tmp_slots.add(slot)
+                self._tmp_pool.append(slot)
+        if self._tmp_pool:
+            return self._tmp_pool.pop()
+        return tempfile.mkdtemp(prefix="run", dir=self._tmp_root)
+    
+    def _release_tmpdir(self, tmpdir: str) -> None:
+        """Empty a scratch directory in place and return it to the pool.
+        
+        A slot that cannot be fully emptied is recreated, or dropped from the
+        pool if that fails, so stale inputs or outputs never leak into a later
+        run. Cleanup errors are logged rather than raised. One-off
+        directories created while the pool was empty are simply removed.
+        """
+        if tmpdir not in self._tmp_slots:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            return
+        
+        try:
+            with os.scandir(tmpdir) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"Failed to list scratch directory {tmpdir}: {e}")
+            entries = []
+        
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+            except OSError as e:
+                logger.warning(f"Failed to remove {entry.path}: {e}")
+        
+        try:
+            clean = not os.listdir(tmpdir)
+        except OSError:
+            clean = False
+        if not clean:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            try:
+                os.mkdir(tmpdir)
+            except OSError as e:
+                # Runs fall back to one-off directories once the pool is empty
+                logger.warning(f"Dropping scratch directory {tmpdir} from the pool: {e}")
+                self._discard_tmpdir(tmpdir)
+                return
+        
+        self._tmp_pool.append(tmpdir)
+    
+    def _discard_tmpdir(self, tmpdir: str) -> None:
+        """Remove a scratch directory for good instead of returning it to the pool."""
+        self._tmp_slots.discard(tmpdir)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    
+    def _read_output(self, output_file: str) -> str:
+        """Decode output_file through a read-only mmap, truncating at max_output_size."""
+        limit = self.settings.max_output_size
+        with open(output_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = mm[:limit].decode("utf-8", errors="replace")
+        
+        if size > limit:
+            text += f"\n\n[Output truncated at {limit} bytes]"
+        return text
+    
     async def run(self):
         async with stdio_server() as (read_stream, write_stream):
             await self.server.run(read_stream, write_stream)
 
 
+def use_uvloop_if_available() -> None:
+    """Install uvloop as the event loop policy when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    uvloop.install()
+
+
 async def main():
     logging.basicConfig(level=logging.INFO)
     server = InterproServer()
@@ -150,4 +405,5 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    use_uvloop_if_available()
+    asyncio.run(main())
@@ -1,19 +1,43 @@
 """
 InterPro MCP server with queue support for long-running jobs
 """
+from functools import partial
 from typing import Any, Optional
 from mcp.types import TextContent, ErrorContent
-from .server import InterproServer
-from .queue_integration import QueueIntegrationMixin
+from .server import InterproServer, use_uvloop_if_available
+from .queue_integration import QueueClient
 
 
-class InterproServerWithQueue(QueueIntegrationMixin, InterproServer):
-    """InterPro server with async job queue support"""
+# Static response text, built once at import time
+_ASYNC_SUBMIT_SUFFIX = (
+    "\n\nUse 'get_job_status' with job ID to check progress.\n"
+    "InterProScan jobs typically take 30 minutes to several hours depending on:\n"
+    "• Number of sequences in input file\n"
+    "• Length of sequences\n"
+    "• Number of databases selected\n"
+    "• Server load\n\n"
+    "You will be notified when the job completes."
+)
+
+_RESULT_DOWNLOAD_NOTE = (
+    "TSV/XML/JSON results and detailed annotations available for download.\n"
+    "Results available for 30 days.\n"
+)
+
+
+class InterproServerWithQueue:
+    """InterPro server with async job queue support
+    
+    Wraps an InterproServer and a queue client rather than inheriting from
+    both, and registers its own handlers on the wrapped MCP server.
+    """
     
     def __init__(self, settings=None, queue_url: Optional[str] = None):
-        # Set queue URL before calling parent init
         self.queue_url = queue_url or "http://localhost:8000"
-        super().__init__(settings)
+        self._base = InterproServer(settings)
+        self._queue = QueueClient(self.queue_url)
+        self.settings = self._base.settings
+        self.server = self._base.server
         self._setup_async_handlers()
     
     def _setup_async_handlers(self):
@@ -47,47 +71,52 @@ class InterproServerWithQueue(QueueIntegrationMixin, InterproServer):
                         "type": "boolean", 
                         "description": "Include pathway annotations",
                         "default": True
+                    },
+                    "disable_precalc": {
+                        "type": "boolean",
+                        "description": "Skip the precalculated match lookup and compute every match locally",
+                        "default": False
+                    },
+                    "cpus": {
+                        "type": "integer",
+                        "description": "Number of CPU cores InterProScan may use (defaults to all cores on the worker)"
                     }
                 },
                 "required_params": ["input_file"]
             }
         }
         
+        # Build the combined tool list once; base tools are cached by the parent
+        async_tools = self._queue.get_async_tools(async_tool_configs)
+        self._combined_tools = list(self._base.tools) + list(async_tools)
+        
         @self.server.list_tools()
         async def list_tools():
-            # Get base tools from parent
-            base_tools = await super(InterproServerWithQueue, self).server.list_tools()
-            
-            # Add async variants
-            async_tools = self.get_async_tools(async_tool_configs)
-            
-            return base_tools + async_tools
+            return self._combined_tools
+        
+        # Map tool names to handlers so dispatch is a single dict lookup
+        self._handlers = {
+            **self._base.tool_handlers,
+            "get_job_status": lambda arguments: self._handle_job_status(arguments["job_id"]),
+            "get_job_result": lambda arguments: self._handle_job_result(arguments["job_id"]),
+            "list_my_jobs": self._handle_list_jobs,
+            "cancel_job": lambda arguments: self._handle_cancel_job(arguments["job_id"]),
+        }
+        for base_name, config in async_tool_configs.items():
+            self._handlers[f"{base_name}_async"] = partial(
+                self._handle_async_tool, base_name, config["job_type"]
+            )
         
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Any):
-            # Handle async tools
-            if name.endswith("_async"):
-                base_name = name[:-6]  # Remove _async suffix
-                if base_name in async_tool_configs:
-                    return await self._handle_async_tool(
-                        base_name,
-                        async_tool_configs[base_name]["job_type"],
-                        arguments
-                    )
-            
-            # Handle job management tools
-            elif name == "get_job_status":
-                return await self._handle_job_status(arguments["job_id"])
-            elif name == "get_job_result":
-                return await self._handle_job_result(arguments["job_id"])
-            elif name == "list_my_jobs":
-                return await self._handle_list_jobs(arguments)
-            elif name == "cancel_job":
-                return await self._handle_cancel_job(arguments["job_id"])
-            
-            # Otherwise delegate to parent
-            else:
-                return await super(InterproServerWithQueue, self).server.call_tool(name, arguments)
+            return await self._dispatch(name, arguments)
+    
+    async def _dispatch(self, name: str, arguments: Any) -> list[TextContent | ErrorContent]:
+        """Route a tool call to its handler"""
+        handler = self._handlers.get(name)
+        if handler is None:
+            return [ErrorContent(text=f"Unknown tool: {name}")]
+        return await handler(arguments)
     
     async def _handle_async_tool(
         self,
@@ -103,7 +132,7 @@ class InterproServerWithQueue(QueueIntegrationMixin, InterproServer):
             notification_email = arguments.pop("notification_email", None)
             
             # Submit job
-            job_info = await self.submit_job(
+            job_info = await self._queue.submit_job(
                 job_type=job_type,
                 parameters=arguments,
                 priority=priority,
@@ -112,14 +141,7 @@ class InterproServerWithQueue(QueueIntegrationMixin, InterproServer):
             
             return [TextContent(
                 text=f"InterProScan job submitted successfully!\n\n"
-                     f"{self.format_job_status(job_info)}\n\n"
-                     f"Use 'get_job_status' with job ID to check progress.\n"
-                     f"InterProScan jobs typically take 30 minutes to several hours depending on:\n"
-                     f"• Number of sequences in input file\n"
-                     f"• Length of sequences\n"
-                     f"• Number of databases selected\n"
-                     f"• Server load\n\n"
-                     f"You will be notified when the job completes."
+                     f"{self._queue.format_job_status(job_info)}{_ASYNC_SUBMIT_SUFFIX}"
             )]
             
         except Exception as e:
@@ -128,46 +150,43 @@ class InterproServerWithQueue(QueueIntegrationMixin, InterproServer):
     async def _handle_job_status(self, job_id: str) -> list[TextContent | ErrorContent]:
         """Get job status"""
         try:
-            job_info = await self.get_job_status(job_id)
-            return [TextContent(text=self.format_job_status(job_info))]
+            job_info = await self._queue.get_job_status(job_id)
+            return [TextContent(text=self._queue.format_job_status(job_info))]
         except Exception as e:
             return [ErrorContent(text=str(e))]
     
     async def _handle_job_result(self, job_id: str) -> list[TextContent | ErrorContent]:
         """Get job results"""
         try:
-            result = await self.get_job_result(job_id)
+            result = await self._queue.get_job_result(job_id)
             
-            result_text = f"InterProScan Job {job_id} Results\n"
-            result_text += "=" * 50 + "\n\n"
+            parts = [f"InterProScan Job {job_id} Results\n", "=" * 50, "\n\n"]
             
             if "summary" in result:
-                result_text += "Analysis Summary:\n"
-                for key, value in result["summary"].items():
-                    result_text += f"  • {key}: {value}\n"
-                result_text += "\n"
+                parts.append("Analysis Summary:\n")
+                parts.extend(f"  • {key}: {value}\n" for key, value in result["summary"].items())
+                parts.append("\n")
             
             if "sequences_processed" in result:
-                result_text += f"Sequences processed: {result['sequences_processed']}\n"
+                parts.append(f"Sequences processed: {result['sequences_processed']}\n")
             
             if "domains_found" in result:
-                result_text += f"Protein domains found: {result['domains_found']}\n"
+                parts.append(f"Protein domains found: {result['domains_found']}\n")
                 
             if "families_found" in result:
-                result_text += f"Protein families identified: {result['families_found']}\n"
+                parts.append(f"Protein families identified: {result['families_found']}\n")
             
             if "go_terms" in result:
-                result_text += f"GO terms assigned: {result['go_terms']}\n"
+                parts.append(f"GO terms assigned: {result['go_terms']}\n")
                 
             if "pathways" in result:
-                result_text += f"Pathways mapped: {result['pathways']}\n"
+                parts.append(f"Pathways mapped: {result['pathways']}\n")
             
             if "result_url" in result:
-                result_text += f"\nFull results: {result['result_url']}\n"
-                result_text += "TSV/XML/JSON results and detailed annotations available for download.\n"
-                result_text += "Results available for 30 days.\n"
+                parts.append(f"\nFull results: {result['result_url']}\n")
+                parts.append(_RESULT_DOWNLOAD_NOTE)
             
-            return [TextContent(text=result_text)]
+            return [TextContent(text="".join(parts))]
             
         except Exception as e:
             return [ErrorContent(text=str(e))]
@@ -182,10 +201,13 @@ class InterproServerWithQueue(QueueIntegrationMixin, InterproServer):
     async def _handle_cancel_job(self, job_id: str) -> list[TextContent | ErrorContent]:
         """Cancel a job"""
         try:
-            result = await self.cancel_job(job_id)
+            result = await self._queue.cancel_job(job_id)
             return [TextContent(text=f"InterProScan job {job_id} cancelled successfully")]
         except Exception as e:
             return [ErrorContent(text=str(e))]
+    
+    async def run(self):
+        await self._base.run()
 
 
 async def main():
@@ -197,4 +219,5 @@ async def main():
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(main())
\ No newline at end of file
+    use_uvloop_if_available()
+    asyncio.run(main())
@@ -1,9 +1,14 @@
+import asyncio
+import errno
+import os
+import signal
 import pytest
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
 import tempfile
+from pydantic import ValidationError
 
-from src.server import InterproServer, ServerSettings
+from src.server import InterproServer, ServerSettings, _concat_inputs, _stage_input
 
 
 @pytest.fixture
@@ -15,6 +20,27 @@ def server():
     return InterproServer(settings)
 
 
+@pytest.fixture
+def mock_exec():
+    """Patch subprocess creation with a successful fake InterProScan run.
+    
+    Each call records the staged input text in ``mock_exec.staged_inputs`` and
+    writes ``b"output data"`` to the -o path, as InterProScan would.
+    """
+    mock_process = AsyncMock()
+    mock_process.returncode = 0
+    mock_process.communicate.return_value = (None, b"")
+    
+    async def fake_exec(*cmd, **kwargs):
+        mocked.staged_inputs.append(Path(cmd[cmd.index("-i") + 1]).read_text())
+        Path(cmd[cmd.index("-o") + 1]).write_bytes(b"output data")
+        return mock_process
+    
+    with patch("asyncio.create_subprocess_exec", side_effect=fake_exec) as mocked:
+        mocked.staged_inputs = []
+        yield mocked
+
+
 @pytest.mark.asyncio
 async def test_list_tools(server):
     tools = await server.server.list_tools()
@@ -32,21 +58,269 @@ async def test_run_interpro_missing_file(server):
 
 
 @pytest.mark.asyncio
-async def test_run_interpro_success(server, tmp_path):
+async def test_run_interpro_success(server, tmp_path, mock_exec):
     # Create test FASTA input file
     input_file = tmp_path / "test_input.fasta"
     input_file.write_text(">test_protein\nMKVLLTGAPGVGKGTQA\n")
     
-    # Mock subprocess execution
-    with patch("asyncio.create_subprocess_exec") as mock_exec:
-        mock_process = AsyncMock()
-        mock_process.returncode = 0
-        mock_process.communicate.return_value = (b"output data", b"")
-        mock_exec.return_value = mock_process
-        
-        result = await server._run_interpro({
-            "input_file": str(input_file)
-        })
-        
-        assert len(result) == 1
-        assert result[0].text == "output data"
\ No newline at end of file
+    result = await server._run_interpro({
+        "input_file": str(input_file)
+    })
+    
+    assert len(result) == 1
+    assert result[0].text == "output data"
+
+
+def test_read_output_truncates_large_files(tmp_path):
+    server = InterproServer(ServerSettings(max_output_size=4))
+    output_file = tmp_path / "out.tsv"
+    output_file.write_bytes(b"abcdefgh")
+    
+    text = server._read_output(str(output_file))
+    
+    assert text.startswith("abcd")
+    assert "truncated" in text
+
+
+def test_stage_input_does_not_copy_into_memory(tmp_path):
+    src = tmp_path / "src.fasta"
+    src.write_text(">p\nMKV\n")
+    dst = tmp_path / "staged" / "src.fasta"
+    dst.parent.mkdir()
+    
+    _stage_input(str(src), str(dst))
+    
+    assert dst.read_text() == ">p\nMKV\n"
+    assert os.path.samefile(src, dst)
+
+
+def test_stage_input_replaces_stale_link(tmp_path):
+    first = tmp_path / "u1" / "in.fasta"
+    second = tmp_path / "u2" / "in.fasta"
+    for path, text in ((first, ">original\n"), (second, ">other\n")):
+        path.parent.mkdir()
+        path.write_text(text)
+    dst = tmp_path / "slot" / "in.fasta"
+    dst.parent.mkdir()
+    
+    _stage_input(str(first), str(dst))
+    with patch("os.link", side_effect=OSError(errno.EXDEV, "cross-device")), \
+            patch("os.symlink", side_effect=OSError(errno.EPERM, "not permitted")):
+        _stage_input(str(second), str(dst))
+    
+    assert first.read_text() == ">original\n"
+    assert dst.read_text() == ">other\n"
+
+
+def test_concat_inputs_separates_files(tmp_path):
+    first = tmp_path / "a.fasta"
+    first.write_text(">a\nMKV")
+    second = tmp_path / "b.fasta"
+    second.write_text(">b\nGAP\n")
+    dst = tmp_path / "batch.fasta"
+    
+    _concat_inputs([str(first), str(second)], str(dst))
+    
+    assert dst.read_text() == ">a\nMKV\n>b\nGAP\n"
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_batch_single_invocation(server, tmp_path, mock_exec):
+    inputs = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.fasta"
+        path.write_text(f">{name}\nMKVLLTGAPGVGKGTQA\n")
+        inputs.append(str(path))
+    
+    result = await server._run_interpro({"input_files": inputs})
+    
+    assert mock_exec.call_count == 1
+    assert mock_exec.staged_inputs == [">a\nMKVLLTGAPGVGKGTQA\n>b\nMKVLLTGAPGVGKGTQA\n"]
+    assert result[0].text == "output data"
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_batch_with_input_file(server, tmp_path, mock_exec):
+    first = tmp_path / "a.fasta"
+    first.write_text(">a\nMKV\n")
+    second = tmp_path / "b.fasta"
+    second.write_text(">b\nGAP\n")
+    
+    await server._run_interpro({"input_file": str(first), "input_files": [str(second)]})
+    
+    assert mock_exec.staged_inputs == [">a\nMKV\n>b\nGAP\n"]
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_rejects_non_list_input_files(server, mock_exec):
+    result = await server._run_interpro({"input_files": "/tmp/a.fasta"})
+    
+    assert result[0].text == "input_files must be a list of file paths"
+    assert mock_exec.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_precalc_opt_out(server, tmp_path, mock_exec):
+    input_file = tmp_path / "test_input.fasta"
+    input_file.write_text(">test_protein\nMKVLLTGAPGVGKGTQA\n")
+    
+    await server._run_interpro({"input_file": str(input_file)})
+    await server._run_interpro({"input_file": str(input_file), "disable_precalc": True})
+    
+    assert "--disable-precalc" not in mock_exec.call_args_list[0].args
+    assert "--disable-precalc" in mock_exec.call_args_list[1].args
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_passes_cpu_count(server, tmp_path, mock_exec):
+    input_file = tmp_path / "test_input.fasta"
+    input_file.write_text(">test_protein\nMKVLLTGAPGVGKGTQA\n")
+    
+    await server._run_interpro({"input_file": str(input_file), "cpus": 3})
+    
+    cmd = mock_exec.call_args.args
+    assert cmd[cmd.index("-cpu") + 1] == "3"
+
+
+def test_tmpdir_pool_reuses_emptied_directory(tmp_path):
+    server = InterproServer(ServerSettings(temp_dir=str(tmp_path), scratch_pool_size=1))
+    
+    tmpdir = server._acquire_tmpdir()
+    Path(tmpdir, "leftover.tsv").write_text("data")
+    server._release_tmpdir(tmpdir)
+    
+    assert server._acquire_tmpdir() == tmpdir
+    assert not any(Path(tmpdir).iterdir())
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_timeout_kills_process_group(tmp_path):
+    server = InterproServer(ServerSettings(temp_dir=str(tmp_path), timeout=0))
+    input_file = tmp_path / "test_input.fasta"
+    input_file.write_text(">test_protein\nMKVLLTGAPGVGKGTQA\n")
+    
+    async def hang():
+        await asyncio.sleep(10)
+    
+    mock_process = AsyncMock()
+    mock_process.pid = 12345
+    mock_process.communicate.side_effect = hang
+    
+    with patch("asyncio.create_subprocess_exec", return_value=mock_process), \
+            patch("os.killpg") as mock_killpg:
+        result = await server._run_interpro({"input_file": str(input_file)})
+    
+    mock_killpg.assert_called_once_with(12345, signal.SIGKILL)
+    mock_process.wait.assert_awaited()
+    assert "timed out" in result[0].text
+
+
+
+@pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX only")
+@pytest.mark.asyncio
+async def test_run_interpro_cancel_kills_process_group(tmp_path):
+    script = tmp_path / "interproscan.sh"
+    script.write_text("#!/bin/sh\nsleep 30\n")
+    script.chmod(0o755)
+    server = InterproServer(ServerSettings(interpro_path=str(script), temp_dir=str(tmp_path)))
+    input_file = tmp_path / "test_input.fasta"
+    input_file.write_text(">test_protein\nMKVLLTGAPGVGKGTQA\n")
+    
+    started = []
+    real_exec = asyncio.create_subprocess_exec
+    async def recording_exec(*cmd, **kwargs):
+        process = await real_exec(*cmd, **kwargs)
+        started.append(process)
+        return process
+    
+    with patch("asyncio.create_subprocess_exec", side_effect=recording_exec):
+        task = asyncio.create_task(server._run_interpro({"input_file": str(input_file)}))
+        while not started:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    assert started[0].returncode is not None
+
+
+@pytest.mark.asyncio
+async def test_run_interpro_cancel_never_requeues_live_slot(tmp_path):
+    server = InterproServer(ServerSettings(temp_dir=str(tmp_path), scratch_pool_size=1))
+    input_file = tmp_path / "test_input.fasta"
+    input_file.write_text(">test_protein\nMKVLLTGAPGVGKGTQA\n")
+    
+    async def hang():
+        await asyncio.sleep(10)
+    
+    # A child that ignores the kill and never exits
+    mock_process = AsyncMock()
+    mock_process.pid = 12345
+    mock_process.returncode = None
+    mock_process.communicate.side_effect = hang
+    mock_process.wait.side_effect = hang
+    
+    with patch("asyncio.create_subprocess_exec", return_value=mock_process) as mock_exec, \
+            patch("os.killpg"), patch("src.server._REAP_TIMEOUT", 0.01):
+        task = asyncio.create_task(server._run_interpro({"input_file": str(input_file)}))
+        while not mock_exec.called:
+            await asyncio.sleep(0.01)
+        slot = mock_exec.call_args.kwargs["cwd"]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    assert slot not in server._tmp_pool
+    assert server._acquire_tmpdir() != slot
+
+def test_tmpdir_pool_never_requeues_dirty_slot(tmp_path):
+    server = InterproServer(ServerSettings(temp_dir=str(tmp_path), scratch_pool_size=1))
+    
+    tmpdir = server._acquire_tmpdir()
+    for name in ("a.tsv", "b.tsv"):
+        Path(tmpdir, name).write_text("stale")
+    
+    real_unlink = os.unlink
+    def flaky_unlink(path, **kwargs):
+        if path.endswith("a.tsv"):
+            raise PermissionError(errno.EACCES, "denied", path)
+        real_unlink(path, **kwargs)
+    
+    with patch("os.unlink", side_effect=flaky_unlink):
+        server._release_tmpdir(tmpdir)
+    
+    slot = server._acquire_tmpdir()
+    assert not any(Path(slot).iterdir())
+
+
+
+def test_tmpdir_pool_drops_slot_that_cannot_be_recreated(tmp_path):
+    server = InterproServer(ServerSettings(temp_dir=str(tmp_path), scratch_pool_size=1))
+    
+    tmpdir = server._acquire_tmpdir()
+    Path(tmpdir, "a.tsv").write_text("stale")
+    
+    with patch("os.unlink", side_effect=PermissionError(errno.EACCES, "denied")), \
+            patch("os.mkdir", side_effect=PermissionError(errno.EACCES, "denied")):
+        server._release_tmpdir(tmpdir)
+    
+    assert tmpdir not in server._tmp_slots
+    assert tmpdir not in server._tmp_pool
+
+def test_tmpdir_pool_falls_back_when_exhausted(tmp_path):
+    server = InterproServer(ServerSettings(temp_dir=str(tmp_path), scratch_pool_size=1))
+    
+    pooled = server._acquire_tmpdir()
+    extra = server._acquire_tmpdir()
+    assert extra != pooled
+    
+    server._release_tmpdir(extra)
+    server._release_tmpdir(pooled)
+    
+    assert not os.path.exists(extra)
+    assert server._acquire_tmpdir() == pooled
+
+
+def test_scratch_pool_size_must_be_positive():
+    with pytest.raises(ValidationError):
+        ServerSettings(scratch_pool_size=0)
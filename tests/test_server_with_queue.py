@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import AsyncMock
+import tempfile
+
+from src.server import ServerSettings
+from src.server_with_queue import InterproServerWithQueue
+
+
+JOB_INFO = {
+    "job_id": "job-1",
+    "job_type": "interpro_scan",
+    "status": "pending",
+    "created_at": "2024-01-01T00:00:00",
+}
+
+
+@pytest.fixture
+def server():
+    settings = ServerSettings(
+        interpro_path="mock_interproscan.sh",
+        temp_dir=tempfile.gettempdir()
+    )
+    return InterproServerWithQueue(settings, queue_url="http://queue.test")
+
+
+def test_queue_client_uses_configured_url(server):
+    assert server._queue.queue_url == "http://queue.test"
+
+
+def test_combined_tools_include_base_and_async(server):
+    names = [tool.name for tool in server._combined_tools]
+    assert names[0] == "interpro_run"
+    for name in ("interpro_run_async", "get_job_status", "get_job_result", "list_my_jobs", "cancel_job"):
+        assert name in names
+
+
+@pytest.mark.asyncio
+async def test_dispatch_routes_interpro_run_to_base(server):
+    result = await server._dispatch("interpro_run", {"input_file": "/nonexistent/file.txt"})
+    assert result[0].text.startswith("Input file not found")
+
+
+@pytest.mark.asyncio
+async def test_dispatch_routes_async_tool_to_queue(server):
+    server._queue.submit_job = AsyncMock(return_value=JOB_INFO)
+    
+    result = await server._dispatch("interpro_run_async", {"input_file": "/data/p.fasta", "priority": 7})
+    
+    server._queue.submit_job.assert_awaited_once_with(
+        job_type="interpro_scan",
+        parameters={"input_file": "/data/p.fasta"},
+        priority=7,
+        tags=[]
+    )
+    assert result[0].text.startswith("InterProScan job submitted successfully!")
+
+
+@pytest.mark.asyncio
+async def test_dispatch_routes_job_tools(server):
+    server._queue.get_job_status = AsyncMock(return_value=JOB_INFO)
+    server._queue.get_job_result = AsyncMock(return_value={"domains_found": 3})
+    server._queue.cancel_job = AsyncMock(return_value={})
+    
+    status = await server._dispatch("get_job_status", {"job_id": "job-1"})
+    result = await server._dispatch("get_job_result", {"job_id": "job-1"})
+    cancelled = await server._dispatch("cancel_job", {"job_id": "job-1"})
+    listing = await server._dispatch("list_my_jobs", {})
+    
+    server._queue.get_job_status.assert_awaited_once_with("job-1")
+    assert "Job ID: job-1" in status[0].text
+    assert "Protein domains found: 3" in result[0].text
+    assert cancelled[0].text == "InterProScan job job-1 cancelled successfully"
+    assert listing[0].text.startswith("Job listing not yet implemented")
+
+
+@pytest.mark.asyncio
+async def test_dispatch_unknown_tool(server):
+    result = await server._dispatch("not_a_tool", {})
+    assert result[0].text == "Unknown tool: not_a_tool"